@@ -18,14 +18,18 @@
 #
 from __future__ import annotations
 
-import collections.abc
+import hashlib
 import os
+import re
 import sys
 import types
 from typing import TYPE_CHECKING, cast
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from sphinx.application import Sphinx
+    from sphinx.environment import BuildEnvironment
     from sphinx.util.typing import Inventory
 
 # For our local_customization module
@@ -36,19 +40,47 @@ sys.path.insert(0, os.path.abspath("../../src"))
 # Enable reloading with `typing.TYPE_CHECKING` being True
 os.environ["SPHINX_AUTODOC_RELOAD_MODULES"] = "1"
 
-# https://docs.readthedocs.io/en/stable/builds.html#build-environment
-if "READTHEDOCS" in os.environ:
-    import glob
 
-    if glob.glob("../../newsfragments/*.*.rst"):
-        print("-- Found newsfragments; running towncrier --", flush=True)
-        import subprocess
+def _has_newsfragments() -> bool:
+    """Check for a ``*.*.rst`` newsfragment, stopping at the first one found."""
+    try:
+        with os.scandir("../../newsfragments") as entries:
+            return any(
+                not entry.name.startswith(".")
+                and entry.name.endswith(".rst")
+                and entry.name.count(".") >= 2
+                for entry in entries
+            )
+    except FileNotFoundError:
+        return False
+
 
-        subprocess.run(
-            ["towncrier", "--yes", "--date", "not released yet"],
-            cwd="../..",
-            check=True,
-        )
+# The release history with the newsfragments rendered in, substituted for
+# history.rst when reading the sources. See on_read_source.
+history_new: str | None = None
+
+# https://docs.readthedocs.io/en/stable/builds.html#build-environment
+if "READTHEDOCS" in os.environ and _has_newsfragments():
+    import subprocess
+    from pathlib import Path
+
+    print("-- Found newsfragments; running towncrier --", flush=True)
+    # history.rst itself is never modified, since changing it would make Sphinx
+    # consider it outdated on the next build.
+    history_orig = Path("history.rst").read_text("utf8")
+    # --draft only prints the rendered newsfragments, so towncrier neither
+    # writes history.rst nor forks git to stage it or remove fragments.
+    rendered = subprocess.run(
+        ["towncrier", "--draft", "--date", "not released yet"],
+        cwd="../..",
+        check=True,
+        capture_output=True,
+        encoding="utf8",
+    ).stdout
+    # Insert it after the start marker, the same way towncrier would, minus
+    # the trailing newline added when printing it.
+    header, start, body = history_orig.partition(".. towncrier release notes start\n")
+    history_new = f"{header.rstrip()}\n\n{start}\n{rendered[:-1]}{body.lstrip()}"
 
 # Sphinx is very finicky, and somewhat buggy, so we have several different
 # methods to help it resolve links.
@@ -67,8 +99,9 @@ if "READTHEDOCS" in os.environ:
 
 # Warn about all references to unknown targets
 nitpicky = True
-# Except for these ones, which we expect to point to unknown targets:
-nitpick_ignore = [
+# Except for these ones, which we expect to point to unknown targets.
+# A set, since Sphinx checks every unresolved reference against it.
+nitpick_ignore = {
     ("py:class", "CapacityLimiter-like object"),
     ("py:class", "bytes-like"),
     # Was removed but still shows up in changelog
@@ -82,7 +115,7 @@ nitpick_ignore = [
     # nor entries in objects.inv
     ("py:class", "socket.AddressFamily"),
     ("py:class", "socket.SocketKind"),
-]
+}
 autodoc_inherit_docstrings = False
 default_role = "obj"
 
@@ -95,6 +128,41 @@ autodoc_type_aliases = {
     "SSLStream": "trio.SSLStream",
 }
 
+# Replacements made in every signature by autodoc_process_signature. They're
+# combined into a single regex so each signature is only scanned once.
+_SIGNATURE_REPLACEMENTS = {
+    "~_contextvars.Context": "~contextvars.Context",
+    # Strip the type from the union, make it look like = ...
+    " | type[trio._core._local._NoValue]": "",
+    "<class 'trio._core._local._NoValue'>": "...",
+    # Don't specify PathLike[str] | PathLike[bytes], this is just for humans.
+    "StrOrBytesPath": "str | bytes | os.PathLike",
+}
+_SIGNATURE_REPLACEMENTS_RE = re.compile(
+    "|".join(map(re.escape, _SIGNATURE_REPLACEMENTS))
+)
+
+
+def _strip_runvar_typevar(signature: str) -> str:
+    # Typevar is not useful here.
+    return signature.replace(": ~trio._core._local.T", "")
+
+
+def _qualify_covariant_typevars(signature: str) -> str:
+    # This typevar being covariant isn't handled correctly in some cases, strip the +
+    # and insert the fully-qualified name.
+    signature = signature.replace("+E", "~trio.testing._raises_group.E")
+    return signature.replace("+MatchE", "~trio.testing._raises_group.MatchE")
+
+
+# Replacements only made in the signatures of specific objects, looked up by
+# name so other objects skip them with a single dict lookup.
+_SIGNATURE_FIXES_BY_NAME: dict[str, Callable[[str], str]] = {
+    "trio.lowlevel.RunVar": _strip_runvar_typevar,
+    "trio.testing.RaisesGroup": _qualify_covariant_typevars,
+    "trio.testing.Matcher": _qualify_covariant_typevars,
+}
+
 
 # https://www.sphinx-doc.org/en/master/usage/extensions/autodoc.html#event-autodoc-process-signature
 def autodoc_process_signature(
@@ -118,30 +186,49 @@ def autodoc_process_signature(
         ), obj.fget.__annotations__
         obj.fget.__annotations__["return"] = "type[~trio.testing._raises_group.MatchE]"
     if signature is not None:
-        signature = signature.replace("~_contextvars.Context", "~contextvars.Context")
-        if name == "trio.lowlevel.RunVar":  # Typevar is not useful here.
-            signature = signature.replace(": ~trio._core._local.T", "")
-        if "_NoValue" in signature:
-            # Strip the type from the union, make it look like = ...
-            signature = signature.replace(" | type[trio._core._local._NoValue]", "")
-            signature = signature.replace("<class 'trio._core._local._NoValue'>", "...")
-        if name in ("trio.testing.RaisesGroup", "trio.testing.Matcher") and (
-            "+E" in signature or "+MatchE" in signature
-        ):
-            # This typevar being covariant isn't handled correctly in some cases, strip the +
-            # and insert the fully-qualified name.
-            signature = signature.replace("+E", "~trio.testing._raises_group.E")
-            signature = signature.replace(
-                "+MatchE", "~trio.testing._raises_group.MatchE"
-            )
+        signature = _SIGNATURE_REPLACEMENTS_RE.sub(
+            lambda match: _SIGNATURE_REPLACEMENTS[match.group()], signature
+        )
+        fix_signature = _SIGNATURE_FIXES_BY_NAME.get(name)
+        if fix_signature is not None:
+            signature = fix_signature(signature)
         if "DTLS" in name:
             signature = signature.replace("SSL.Context", "OpenSSL.SSL.Context")
-        # Don't specify PathLike[str] | PathLike[bytes], this is just for humans.
-        signature = signature.replace("StrOrBytesPath", "str | bytes | os.PathLike")
 
     return signature, return_annotation
 
 
+# https://www.sphinx-doc.org/en/master/extdev/appapi.html#event-source-read
+def on_read_source(app: Sphinx, docname: str, content: list[str]) -> None:
+    """Substitute the rendered release history for history.rst."""
+    if docname == "history":
+        assert history_new is not None
+        content[0] = history_new
+
+
+# https://www.sphinx-doc.org/en/master/extdev/appapi.html#event-env-get-outdated
+def on_env_get_outdated(
+    app: Sphinx,
+    env: BuildEnvironment,
+    added: set[str],
+    changed: set[str],
+    removed: set[str],
+) -> list[str]:
+    """Re-read history.rst if the rendered history changed since the last build.
+
+    history.rst doesn't change on disk when the newsfragments do, so Sphinx can't
+    tell by itself. The digest is stored on the environment, which Sphinx pickles
+    between builds.
+    """
+    digest = None
+    if history_new is not None:
+        digest = hashlib.sha256(history_new.encode("utf8")).hexdigest()
+    if getattr(env, "trio_history_digest", None) == digest:
+        return []
+    env.trio_history_digest = digest  # type: ignore[attr-defined]
+    return ["history"]
+
+
 # XX hack the RTD theme until
 #   https://github.com/rtfd/sphinx_rtd_theme/pull/382
 # is shipped (should be in the release after 0.2.4)
@@ -150,6 +237,12 @@ def autodoc_process_signature(
 def setup(app: Sphinx) -> None:
     app.add_css_file("hackrtd.css")
     app.connect("autodoc-process-signature", autodoc_process_signature)
+    # Only hook source reading if there is a rendered history to substitute.
+    if history_new is not None:
+        app.connect("source-read", on_read_source)
+    # Connected even without a rendered history, so history.rst is re-read once
+    # the newsfragments are gone.
+    app.connect("env-get-outdated", on_env_get_outdated)
     # After Intersphinx runs, add additional mappings.
     app.connect("builder-inited", add_intersphinx, priority=1000)
 
@@ -166,7 +259,6 @@ def setup(app: Sphinx) -> None:
 extensions = [
     "sphinx.ext.autodoc",
     "sphinx.ext.intersphinx",
-    "sphinx.ext.coverage",
     "sphinx.ext.napoleon",
     "sphinxcontrib_trio",
     "sphinxcontrib.jquery",
@@ -175,6 +267,10 @@ extensions = [
     "local_customization",
     "typevars",
 ]
+# sphinx.ext.coverage only adds the coverage builder, so skip loading it unless
+# asked for, e.g. `TRIO_DOCS_COVERAGE=1 sphinx-build -b coverage ...`
+if os.environ.get("TRIO_DOCS_COVERAGE"):
+    extensions.append("sphinx.ext.coverage")
 
 intersphinx_mapping = {
     "python": ("https://docs.python.org/3", None),
@@ -183,6 +279,10 @@ intersphinx_mapping = {
     "sniffio": ("https://sniffio.readthedocs.io/en/latest/", None),
     "trio-util": ("https://trio-util.readthedocs.io/en/latest/", None),
 }
+# Downloaded inventories are cached in the doctree directory, so keep them for
+# longer than the default 5 days. Pointing `sphinx-build -d` at a directory
+# that persists between builds lets them skip the downloads entirely.
+intersphinx_cache_limit = 90
 
 # See https://sphinx-hoverxref.readthedocs.io/en/latest/configuration.html
 hoverxref_auto_ref = True
@@ -210,50 +310,48 @@ from trio import *
 """
 
 
+# Extra entries for the Python inventory, added by add_intersphinx.
+# (reftype, library, object, python version, target if not library.object)
+_PYTHON_INVENTORY_FIXUPS: list[tuple[str, str, str, str, str | None]] = [
+    # This has been removed in Py3.12, so add a link to the 3.11 version with deprecation warnings.
+    ("method", "pathlib", "Path.link_to", "3.11", None),
+    # defined in py:data in objects.inv, but sphinx looks for a py:class
+    ("class", "math", "inf", "3.12", None),
+    # `types.FrameType.__module__` is "builtins", so sphinx looks for
+    # builtins.FrameType.
+    # See https://github.com/sphinx-doc/sphinx/issues/11802
+    ("class", "types", "FrameType", "3.12", None),
+]
+
+
 def add_intersphinx(app: Sphinx) -> None:
     """Add some specific intersphinx mappings.
 
     Hooked up to builder-inited. app.builder.env.interpshinx_inventory is not an official API, so this may break on new sphinx versions.
     """
+    import collections.abc
 
-    def add_mapping(
-        reftype: str,
-        library: str,
-        obj: str,
-        version: str = "3.12",
-        target: str | None = None,
-    ) -> None:
-        """helper function"""
-        url_version = "3" if version == "3.12" else version
-        if target is None:
-            target = f"{library}.{obj}"
+    # sphinx doing fancy caching stuff makes this attribute invisible
+    # to type checkers
+    inventory = app.builder.env.intersphinx_inventory  # type: ignore[attr-defined]
+    assert isinstance(inventory, dict)
+    inventory = cast("Inventory", inventory)
 
-        # sphinx doing fancy caching stuff makes this attribute invisible
-        # to type checkers
-        inventory = app.builder.env.intersphinx_inventory  # type: ignore[attr-defined]
-        assert isinstance(inventory, dict)
-        inventory = cast("Inventory", inventory)
+    fixups = _PYTHON_INVENTORY_FIXUPS.copy()
+    # new in py3.12, and need target because sphinx is unable to look up
+    # the module of the object if compiling on <3.12
+    if not hasattr(collections.abc, "Buffer"):
+        fixups.append(("class", "collections.abc", "Buffer", "3.12", "Buffer"))
 
-        inventory[f"py:{reftype}"][f"{target}"] = (
+    for reftype, library, obj, version, target in fixups:
+        url_version = "3" if version == "3.12" else version
+        inventory[f"py:{reftype}"][target or f"{library}.{obj}"] = (
             "Python",
             version,
             f"https://docs.python.org/{url_version}/library/{library}.html/{obj}",
             "-",
         )
 
-    # This has been removed in Py3.12, so add a link to the 3.11 version with deprecation warnings.
-    add_mapping("method", "pathlib", "Path.link_to", "3.11")
-    # defined in py:data in objects.inv, but sphinx looks for a py:class
-    add_mapping("class", "math", "inf")
-    # `types.FrameType.__module__` is "builtins", so sphinx looks for
-    # builtins.FrameType.
-    # See https://github.com/sphinx-doc/sphinx/issues/11802
-    add_mapping("class", "types", "FrameType")
-    # new in py3.12, and need target because sphinx is unable to look up
-    # the module of the object if compiling on <3.12
-    if not hasattr(collections.abc, "Buffer"):
-        add_mapping("class", "collections.abc", "Buffer", target="Buffer")
-
 
 autodoc_member_order = "bysource"
 
@@ -281,6 +379,8 @@ author = "Nathaniel J. Smith"
 # The short X.Y version.
 import trio
 
+# Read from the already imported package, rather than importlib.metadata which
+# has to search sys.path for the installed distribution.
 version = trio.__version__
 # The full version, including alpha/beta/rc tags.
 release = version
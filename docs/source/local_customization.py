@@ -34,5 +34,6 @@ class Interface(PyClasslike):
         return f"{name_cls[0]} (interface in {modname})"
 
 
-def setup(app: Sphinx) -> None:
+def setup(app: Sphinx) -> dict[str, object]:
     app.add_directive_to_domain("py", "interface", Interface)
+    return {"parallel_read_safe": True, "parallel_write_safe": True}
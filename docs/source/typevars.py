@@ -101,6 +101,8 @@ def lookup_reference(
     return new_node
 
 
-def setup(app: Sphinx) -> None:
+def setup(app: Sphinx) -> dict[str, object]:
+    # typevars_named is filled in here, and only read afterwards.
     identify_typevars(Path(trio.__file__).parent)
     app.connect("missing-reference", lookup_reference, -10)
+    return {"parallel_read_safe": True, "parallel_write_safe": True}
@@ -60,6 +60,10 @@ def test_raises_group() -> None:
             ),
         )
 
+    # nested groups don't need to come first
+    with RaisesGroup(RaisesGroup(ValueError), TypeError):
+        raise ExceptionGroup("", (TypeError(), ExceptionGroup("", (ValueError(),))))
+
     # will error if there's excess exceptions
     with pytest.raises(ExceptionGroup):
         with RaisesGroup(ValueError):
@@ -79,6 +83,49 @@ def test_raises_group() -> None:
             raise ExceptionGroup("", (ValueError(),))
 
 
+def test_raises_group_pairing() -> None:
+    # the plain ValueError would also match ValueError("hello"), but then the
+    # Matcher has nothing left to match
+    with RaisesGroup(ValueError, Matcher(ValueError, match="hello")):
+        raise ExceptionGroup("", (ValueError("hello"), ValueError("goodbye")))
+
+    with RaisesGroup(Exception, ValueError, Matcher(ValueError, match="hello")):
+        raise ExceptionGroup("", (ValueError("hello"), ValueError(), TypeError()))
+
+    # each expected exception still needs its own raised exception
+    with pytest.raises(ExceptionGroup):
+        with RaisesGroup(ValueError, Matcher(ValueError, match="hello")):
+            raise ExceptionGroup("", (ValueError("goodbye"), ValueError("goodbye")))
+
+
+def test_raises_group_pairing_large_failing_group() -> None:
+    # failing to pair up a large group doesn't check every pair of exceptions
+    checks = 0
+
+    def counted(exc_type: type[BaseException]) -> Matcher[BaseException]:
+        def check(e: BaseException) -> bool:
+            nonlocal checks
+            checks += 1
+            return isinstance(e, exc_type)
+
+        return Matcher(check=check)
+
+    n = 200
+    value_error = counted(ValueError)
+    # the TypeError doesn't match anything
+    assert not RaisesGroup(*[value_error] * n).matches(
+        ExceptionGroup("", [TypeError()] + [ValueError()] * (n - 1))
+    )
+    assert checks == n
+
+    # the last ValueError only matches already paired Matchers
+    checks = 0
+    assert not RaisesGroup(*[value_error] * (n - 1), counted(TypeError)).matches(
+        ExceptionGroup("", [ValueError()] * n)
+    )
+    assert checks < 4 * n
+
+
 def test_flatten_subgroups() -> None:
     # loose semantics, as with expect*
     with RaisesGroup(ValueError, flatten_subgroups=True):
@@ -108,6 +155,14 @@ def test_flatten_subgroups() -> None:
         RaisesGroup(RaisesGroup(ValueError), flatten_subgroups=True)  # type: ignore[call-overload]
 
 
+def test_flatten_subgroups_deeply_nested() -> None:
+    # flattening doesn't recurse, so isn't limited by the recursion limit
+    exc: Exception = ValueError()
+    for _ in range(sys.getrecursionlimit()):
+        exc = ExceptionGroup("", [exc])
+    assert RaisesGroup(ValueError, flatten_subgroups=True).matches(exc)
+
+
 def test_catch_unwrapped_exceptions() -> None:
     # Catches lone exceptions with strict=False
     # just as except* would
@@ -323,6 +378,15 @@ def test_matcher_match() -> None:
         with RaisesGroup(Matcher(ValueError, match="^bar$")):
             raise ExceptionGroup("", [ValueError("barr")])
 
+    # the message is only checked once the type matches
+    class UnprintableError(ValueError):
+        def __str__(self) -> str:
+            raise AssertionError("should not be stringified")
+
+    assert RaisesGroup(Matcher(TypeError, match="x"), ValueError).matches(
+        ExceptionGroup("", [UnprintableError(), TypeError("x")])
+    )
+
 
 def test_Matcher_check() -> None:
     def check_oserror_and_errno_is_5(e: BaseException) -> bool:
@@ -356,6 +420,12 @@ def test_matcher_tostring() -> None:
     )
 
 
+def test_compiled_patterns_are_shared() -> None:
+    assert RaisesGroup(ValueError, match="foo").match_expr is Matcher(match="foo").match
+    pattern = re.compile("foo", re.IGNORECASE)
+    assert RaisesGroup(ValueError, match=pattern).match_expr is pattern
+
+
 def test__ExceptionInfo(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(
         trio.testing._raises_group,
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import functools
 import re
 import sys
 from typing import (
     TYPE_CHECKING,
     Callable,
     ContextManager,
+    Final,
     Generic,
     Literal,
     Pattern,
@@ -23,6 +25,7 @@ if TYPE_CHECKING:
     # sphinx will *only* work if we use types.TracebackType, and import
     # *inside* TYPE_CHECKING. No other combination works.....
     import types
+    from typing import Tuple, Type, Union
 
     from _pytest._code.code import ExceptionChainRepr, ReprExceptionInfo, Traceback
     from typing_extensions import TypeGuard, TypeVar
@@ -46,6 +49,8 @@ if sys.version_info < (3, 11):
 class _ExceptionInfo(Generic[MatchE]):
     """Minimal re-implementation of pytest.ExceptionInfo, only used if pytest is not available. Supports a subset of its features necessary for functionality of :class:`trio.testing.RaisesGroup` and :class:`trio.testing.Matcher`."""
 
+    __slots__ = ("_excinfo",)
+
     _excinfo: tuple[type[MatchE], MatchE, types.TracebackType] | None
 
     def __init__(
@@ -135,18 +140,142 @@ else:
 
 # copied from pytest.ExceptionInfo
 def _stringify_exception(exc: BaseException) -> str:
-    return "\n".join(
-        [
-            getattr(exc, "message", str(exc)),
-            *getattr(exc, "__notes__", []),
-        ]
-    )
+    message: str | None = getattr(exc, "message", None)
+    if message is None:
+        message = str(exc)
+    notes = getattr(exc, "__notes__", None)
+    # Most exceptions have no notes, don't bother building a list to join.
+    if not notes:
+        return message
+    return message + "\n" + "\n".join(notes)
 
 
 # String patterns default to including the unicode flag.
 _regex_no_flags = re.compile("").flags
 
 
+# re.compile already caches patterns, but a hit in its cache still costs a few
+# hundred ns of type and flag checks. Tests commonly construct many
+# Matchers/RaisesGroups with the same match string, so look them up here first.
+@functools.lru_cache(maxsize=512)
+def _compile_pattern(pattern: str) -> Pattern[str]:
+    return re.compile(pattern)
+
+
+# How RaisesGroup checks an expected exception, worked out once in __init__.
+_EXPECTED_TYPE: Final = 0
+_EXPECTED_MATCHER: Final = 1
+_EXPECTED_GROUP: Final = 2
+
+if TYPE_CHECKING:
+    # Tagged by kind, so checking entry[0] narrows entry[1] without a cast.
+    _PreparedExpected = Union[
+        Tuple[Literal[0], Type[BaseException]],
+        Tuple[Literal[1], "Matcher[BaseException]"],
+        Tuple[Literal[2], "RaisesGroup[BaseException]"],
+    ]
+
+
+def _matched_expected(
+    prepared: Sequence[_PreparedExpected],
+    exception: BaseException,
+    candidates: int,
+    first_only: bool,
+) -> int:
+    """Return a bitmask of the expected exceptions in ``candidates`` that ``exception`` matches.
+
+    ``prepared`` and the bits of ``candidates`` are as in ``RaisesGroup._expected_prepared``.
+    With ``first_only`` we stop at the lowest matching bit.
+    """
+    # Several Matchers may check the message of exception, only stringify it once.
+    stringified: str | None = None
+    res = 0
+    while candidates:
+        low = candidates & -candidates
+        candidates ^= low
+        entry = prepared[low.bit_length() - 1]
+        if entry[0] == _EXPECTED_TYPE:
+            matched = isinstance(exception, entry[1])
+        elif entry[0] == _EXPECTED_MATCHER:
+            matched, stringified = entry[1]._matches(exception, stringified)
+        else:
+            matched = entry[1].matches(exception)
+        if matched:
+            if first_only:
+                return low
+            res |= low
+    return res
+
+
+def _pair_exceptions(
+    prepared: Sequence[_PreparedExpected], actual_exceptions: Sequence[BaseException]
+) -> bool:
+    """Check if every actual exception can be paired with its own expected exception.
+
+    Each actual exception is paired with the first free expected exception it matches.
+    If there is none, but it matches some already paired ones, Kuhn's augmenting path
+    algorithm looks for a way to free one up by re-pairing other exceptions. Paths are
+    searched breadth-first so large groups can't hit the recursion limit, and an actual
+    exception is only checked against the expected exceptions the search needs.
+    """
+    everything = (1 << len(prepared)) - 1
+    # Bitmasks, for each actual exception, of the expected exceptions it has been
+    # checked against, and of those it matched.
+    checked = [0] * len(actual_exceptions)
+    matching = [0] * len(actual_exceptions)
+    owner = [-1] * len(
+        prepared
+    )  # the actual exception each expected one is paired with
+    paired = [-1] * len(actual_exceptions)  # the reverse
+    taken = 0  # bitmask of the expected exceptions that have been paired
+    # reached_from[i] is the actual exception the current search got to expected
+    # exception i from. Following the path back only reads entries set by the same
+    # search, so one list is shared by all of them.
+    reached_from = [-1] * len(prepared)
+    for start, exception in enumerate(actual_exceptions):
+        free = everything & ~taken
+        if low := _matched_expected(prepared, exception, free, True):
+            i_exp = low.bit_length() - 1
+            checked[start] = matching[start] = low
+            owner[i_exp] = start
+            paired[start] = i_exp
+            taken |= low
+            continue
+        checked[start] = free
+        seen = 0
+        queue = [start]
+        for i_actual in queue:
+            if unchecked := everything & ~seen & ~checked[i_actual]:
+                matching[i_actual] |= _matched_expected(
+                    prepared, actual_exceptions[i_actual], unchecked, False
+                )
+                checked[i_actual] |= unchecked
+            candidates = matching[i_actual] & ~seen
+            if untaken := candidates & ~taken:
+                i_free = (untaken & -untaken).bit_length() - 1
+                reached_from[i_free] = i_actual
+                break
+            seen |= candidates
+            while candidates:
+                low = candidates & -candidates
+                candidates ^= low
+                i_exp = low.bit_length() - 1
+                reached_from[i_exp] = i_actual
+                queue.append(owner[i_exp])
+        else:
+            # Also covers exceptions that don't match any expected exception at all,
+            # which is found out as soon as start's own checks come up empty.
+            return False
+        taken |= 1 << i_free
+        # Flip the pairs along the path, which gives start a partner.
+        i_exp = i_free
+        while i_exp != -1:
+            i_actual = reached_from[i_exp]
+            i_exp, paired[i_actual] = paired[i_actual], i_exp
+            owner[paired[i_actual]] = i_actual
+    return True
+
+
 @final
 class Matcher(Generic[MatchE]):
     """Helper class to be used together with RaisesGroups when you want to specify requirements on sub-exceptions. Only specifying the type is redundant, and it's also unnecessary when the type is a nested `RaisesGroup` since it supports the same arguments.
@@ -200,7 +329,7 @@ class Matcher(Generic[MatchE]):
         self.exception_type = exception_type
         self.match: Pattern[str] | None
         if isinstance(match, str):
-            self.match = re.compile(match)
+            self.match = _compile_pattern(match)
         else:
             self.match = match
         self.check = check
@@ -222,20 +351,31 @@ class Matcher(Generic[MatchE]):
             assert isinstance(excinfo.value.__cause__, SyntaxError)
             assert re.search("foo", str(excinfo.value.__cause__)
 
+        """
+        return self._matches(exception)[0]
+
+    def _matches(
+        self, exception: BaseException, stringified: str | None = None
+    ) -> tuple[bool, str | None]:
+        """Check if ``exception`` matches, also returning it stringified if that was needed.
+
+        Callers checking one exception against several Matchers pass the string back in,
+        so it's only built once, and only after a Matcher's type check has passed.
         """
         if self.exception_type is not None and not isinstance(
             exception, self.exception_type
         ):
-            return False
-        if self.match is not None and not re.search(
-            self.match, _stringify_exception(exception)
-        ):
-            return False
+            return False, stringified
+        if (match := self.match) is not None:
+            if stringified is None:
+                stringified = _stringify_exception(exception)
+            if not match.search(stringified):
+                return False, stringified
         # If exception_type is None check() accepts BaseException.
         # If non-none, we have done an isinstance check above.
         if self.check is not None and not self.check(cast(MatchE, exception)):
-            return False
-        return True
+            return False, stringified
+        return True, stringified
 
     def __str__(self) -> str:
         reqs = []
@@ -319,14 +459,13 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
     `RaisesGroup.matches` can also be used directly to check a standalone exception group.
 
 
-    The matching algorithm is greedy, which means cases such as this may fail::
+    The order of the exceptions in the group does not matter, and each expected exception
+    is paired with a different raised exception. So the following passes, even though the
+    first ``ValueError`` on its own would also match ``ValueError("hello")``::
 
         with RaisesGroups(ValueError, Matcher(ValueError, match="hello")):
             raise ExceptionGroup("", (ValueError("hello"), ValueError("goodbye")))
 
-    even though it generally does not care about the order of the exceptions in the group.
-    To avoid the above you should specify the first ValueError with a Matcher as well.
-
     It is also not typechecked perfectly, and that's likely not possible with the current approach. Most common usage should work without issue though.
     """
 
@@ -387,7 +526,11 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
         )
         self.flatten_subgroups: bool = flatten_subgroups
         self.allow_unwrapped = allow_unwrapped
-        self.match_expr = match
+        self.match_expr: Pattern[str] | None
+        if isinstance(match, str):
+            self.match_expr = _compile_pattern(match)
+        else:
+            self.match_expr = match
         self.check = check
         self.is_baseexceptiongroup = False
 
@@ -424,6 +567,7 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
             )
 
         # verify `expected_exceptions` and set `self.is_baseexceptiongroup`
+        prepared: list[_PreparedExpected] = []
         for exc in self.expected_exceptions:
             if isinstance(exc, RaisesGroup):
                 if self.flatten_subgroups:
@@ -434,7 +578,9 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
                         " match a nested structure."
                     )
                 self.is_baseexceptiongroup |= exc.is_baseexceptiongroup
+                prepared.append((_EXPECTED_GROUP, exc))
             elif isinstance(exc, Matcher):
+                prepared.append((_EXPECTED_MATCHER, exc))
                 # The Matcher could match BaseExceptions through the other arguments
                 # but `self.is_baseexceptiongroup` is only used for printing.
                 if exc.exception_type is None:
@@ -445,11 +591,14 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
                 )
             elif isinstance(exc, type) and issubclass(exc, BaseException):
                 self.is_baseexceptiongroup |= not issubclass(exc, Exception)
+                prepared.append((_EXPECTED_TYPE, exc))
             else:
                 raise ValueError(
                     f'Invalid argument "{exc!r}" must be exception type, Matcher, or'
                     " RaisesGroup."
                 )
+        # (kind, expected) pairs, so matches() doesn't redo the isinstance checks.
+        self._expected_prepared: tuple[_PreparedExpected, ...] = tuple(prepared)
 
     def __enter__(self) -> ExceptionInfo[BaseExceptionGroup[E]]:
         self.excinfo: ExceptionInfo[BaseExceptionGroup[E]] = ExceptionInfo.for_later()
@@ -460,10 +609,13 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
     ) -> Sequence[BaseException]:
         """Used if `flatten_subgroups=True`."""
         res: list[BaseException] = []
-        for exc in exceptions:
+        # Walk the tree with an explicit stack rather than recursing. Sub-exceptions
+        # are pushed in reverse so they are popped, and end up in res, in order.
+        stack = list(reversed(exceptions))
+        while stack:
+            exc = stack.pop()
             if isinstance(exc, BaseExceptionGroup):
-                res.extend(self._unroll_exceptions(exc.exceptions))
-
+                stack.extend(reversed(exc.exceptions))
             else:
                 res.append(exc)
         return res
@@ -499,14 +651,13 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
                     return True
             return False
 
-        if self.match_expr is not None and not re.search(
-            self.match_expr, _stringify_exception(exc_val)
+        if (match_expr := self.match_expr) is not None and not match_expr.search(
+            _stringify_exception(exc_val)
         ):
             return False
         if self.check is not None and not self.check(exc_val):
             return False
 
-        remaining_exceptions = list(self.expected_exceptions)
         actual_exceptions: Sequence[BaseException] = exc_val.exceptions
         if self.flatten_subgroups:
             actual_exceptions = self._unroll_exceptions(actual_exceptions)
@@ -515,21 +666,14 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
         if len(actual_exceptions) != len(self.expected_exceptions):
             return False
 
-        # it should be possible to get RaisesGroup.matches typed so as not to
-        # need type: ignore, but I'm not sure that's possible while also having it
-        # transparent for the end user.
-        for e in actual_exceptions:
-            for rem_e in remaining_exceptions:
-                if (
-                    (isinstance(rem_e, type) and isinstance(e, rem_e))
-                    or (isinstance(rem_e, RaisesGroup) and rem_e.matches(e))
-                    or (isinstance(rem_e, Matcher) and rem_e.matches(e))
-                ):
-                    remaining_exceptions.remove(rem_e)  # type: ignore[arg-type]
-                    break
-            else:
-                return False
-        return True
+        if len(actual_exceptions) == 1:
+            # The most common case, no need to pair up exceptions.
+            entry = self._expected_prepared[0]
+            if entry[0] == _EXPECTED_TYPE:
+                return isinstance(actual_exceptions[0], entry[1])
+            return entry[1].matches(actual_exceptions[0])
+
+        return _pair_exceptions(self._expected_prepared, actual_exceptions)
 
     def __exit__(
         self,
@@ -538,12 +682,11 @@ class RaisesGroup(ContextManager[ExceptionInfo[BaseExceptionGroup[E]]], SuperCla
         exc_tb: types.TracebackType | None,
     ) -> bool:
         __tracebackhide__ = True
-        assert (
-            exc_type is not None
-        ), f"DID NOT RAISE any exception, expected {self.expected_type()}"
-        assert (
-            self.excinfo is not None
-        ), "Internal error - should have been constructed in __enter__"
+        # Raise explicitly so this is still reported when running with -O.
+        if exc_type is None:
+            raise AssertionError(
+                f"DID NOT RAISE any exception, expected {self.expected_type()}"
+            )
 
         if not self.matches(exc_val):
             return False